@@ -1,26 +1,148 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from supabase import create_client
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from supabase import acreate_client
+from supabase.lib.client_options import AsyncClientOptions
+from cachetools import LRUCache, TTLCache
+import httpx
+import orjson
+import psycopg
+from psycopg import sql
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.lib.enums import TA_CENTER
-import io
-from datetime import datetime
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
 import re
 
-app = Flask(__name__)
-CORS(app)
+# Biblioteca usada para montar o PDF: 'reportlab' (padrão) ou 'fpdf2'
+PDF_BACKEND = os.environ.get('PDF_BACKEND', 'reportlab')
+if PDF_BACKEND not in ('reportlab', 'fpdf2'):
+    raise RuntimeError(f"PDF_BACKEND inválido: {PDF_BACKEND!r} (use 'reportlab' ou 'fpdf2')")
+
+# Linhas por requisição ao PostgREST (igual ao max-rows padrão do Supabase)
+PAGE_SIZE = 1000
+
+class ClientCache(LRUCache):
+    """Cache LRU de clientes do Supabase que fecha as conexões dos removidos"""
+    
+    def popitem(self):
+        key, (client, http_client) = super().popitem()
+        task = asyncio.get_running_loop().create_task(http_client.aclose())
+        _CLOSING.add(task)
+        task.add_done_callback(_CLOSING.discard)
+        return key, (client, http_client)
+
+# Clientes do Supabase reaproveitados entre pedidos, por (url, chave)
+_CLIENTS = ClientCache(maxsize=32)
+_CLIENTS_LOCK = asyncio.Lock()
+_CLOSING = set()
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+
+# Relatórios gerados recentemente, reaproveitados por pedidos idênticos
+PDF_CACHE = TTLCache(maxsize=256, ttl=30)
+
+# Máximo de linhas por relatório
+MAX_ROWS = 10000
+
+# Tempo máximo, em segundos, para buscar os dados do relatório
+FETCH_TIMEOUT = 30
+
+# A partir de quantas linhas a tabela usa LongTable
+LONG_TABLE_ROWS = 200
+
+# Linhas medidas por coluna e limites de largura das colunas
+WIDTH_SAMPLE_ROWS = 200
+MIN_COL_WIDTH = 1.5*cm
+
+# Sequências de caracteres fora do ASCII, trocadas por um espaço no PDF
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7F]+')
+
+# Fontes e estilos fixos do relatório, carregados uma única vez
+pdfmetrics.getFont('Helvetica')
+pdfmetrics.getFont('Helvetica-Bold')
+
+_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1a1a1a'),
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+SUBTITLE_STYLE = ParagraphStyle(
+    'CustomSubtitle',
+    parent=_STYLES['Normal'],
+    fontSize=10,
+    textColor=colors.HexColor('#666666'),
+    spaceAfter=20,
+    alignment=TA_CENTER
+)
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, 0), 12),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+])
+
+# Pool de processos para a montagem do PDF (CPU-bound, não compartilha o GIL),
+# dividindo os núcleos entre os workers do uvicorn
+POOL_WORKERS = max(1, os.cpu_count() // int(os.environ.get('WEB_CONCURRENCY', 1)))
+EXECUTOR = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+
+@asynccontextmanager
+async def lifespan(app):
+    """Libera os recursos compartilhados ao encerrar a aplicação"""
+    yield
+    EXECUTOR.shutdown()
+    # popitem agenda o fechamento de cada cliente; depois basta aguardar
+    while _CLIENTS:
+        _CLIENTS.popitem()
+    await asyncio.gather(*_CLOSING)
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 def sanitize_text(text):
     """Remove caracteres especiais que podem causar problemas no PDF"""
     if text is None:
         return ""
     text = str(text)
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    return text
+    if text.isascii():
+        return text
+    return _NON_ASCII_RE.sub(' ', text)
 
 def format_value(value):
     """Formata valores para exibição no PDF"""
@@ -28,6 +150,12 @@ def format_value(value):
         return "-"
     if isinstance(value, bool):
         return "Sim" if value else "Não"
+    if isinstance(value, Decimal):
+        # Mesmo valor que o JSON do PostgREST: int sem casas decimais, senão float
+        value = int(value) if str(value).lstrip('-').isdigit() else float(value)
+    if isinstance(value, (date, time)):
+        # Mesmo texto ISO 8601 que o PostgREST devolve para datas e horários
+        return value.isoformat()
     if isinstance(value, (int, float)):
         return str(value)
     if isinstance(value, str):
@@ -36,106 +164,247 @@ def format_value(value):
         return value
     return str(value)
 
+def format_cell(value):
+    """Formata e sanitiza o valor de uma célula em uma única passada"""
+    if value is None:
+        return "-"
+    if isinstance(value, str):
+        if len(value) > 100:
+            value = value[:97] + "..."
+        if value.isascii():
+            return value
+        return _NON_ASCII_RE.sub(' ', value)
+    return sanitize_text(format_value(value))
+
+async def get_client(supabase_url, anon_key):
+    """Retorna um cliente do Supabase com conexões persistentes"""
+    key = (supabase_url, anon_key)
+    async with _CLIENTS_LOCK:
+        entry = _CLIENTS.get(key)
+        if entry is None:
+            http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=30)
+            try:
+                client = await acreate_client(supabase_url, anon_key, options=AsyncClientOptions(httpx_client=http_client))
+            except Exception:
+                await http_client.aclose()
+                raise
+            entry = (client, http_client)
+            _CLIENTS[key] = entry
+    return entry[0]
+
+def report_cache_key(*parts):
+    """Gera a chave de cache de um pedido de relatório"""
+    return hashlib.blake2b(repr(parts).encode('utf-8')).hexdigest()
+
+def order_columns(fields, order_by):
+    """Colunas de ordenação: order_by e, como desempate, os demais campos"""
+    return [order_by] + [field for field in fields if field != order_by]
+
+async def fetch_pages(supabase, table_name, fields, order_by, limit, page_size=PAGE_SIZE):
+    """Busca até limit linhas da tabela, ordenadas, em páginas usando range()"""
+    columns = ','.join(fields)
+    ordering = order_columns(fields, order_by)
+    offset = 0
+    while offset < limit:
+        end = min(offset + page_size, limit) - 1
+        query = supabase.table(table_name).select(columns)
+        for column in ordering:
+            query = query.order(column)
+        response = await query.range(offset, end).execute()
+        rows = response.data
+        if rows:
+            yield rows
+        if len(rows) <= end - offset:
+            break
+        offset = end + 1
+
+async def copy_rows(postgres_dsn, table_name, fields, order_by, limit):
+    """Busca as linhas direto do Postgres com COPY, sem passar pelo PostgREST"""
+    columns = sql.SQL(', ').join(map(sql.Identifier, fields))
+    table = sql.Identifier(table_name)
+    ordering = sql.SQL(', ').join(map(sql.Identifier, order_columns(fields, order_by)))
+    query = sql.SQL("SELECT {} FROM {} ORDER BY {} LIMIT {}").format(
+        columns, table, ordering, sql.Literal(limit)
+    )
+    async with await psycopg.AsyncConnection.connect(postgres_dsn, prepare_threshold=None, connect_timeout=10) as conn:
+        async with conn.cursor() as cur:
+            # Tipos das colunas, para o COPY devolver valores já convertidos
+            await cur.execute(sql.SQL("SELECT {} FROM {} LIMIT 0").format(columns, table))
+            types = [column.type_code for column in cur.description]
+            async with cur.copy(sql.SQL("COPY ({}) TO STDOUT").format(query)) as copy:
+                copy.set_types(types)
+                async for row in copy.rows():
+                    yield dict(zip(fields, row))
+
+async def run_in_pool(func, *args):
+    """Executa func no pool de processos, recriando o pool se ele quebrar"""
+    global EXECUTOR
+    executor = EXECUTOR
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # Um processo do pool morreu (ex.: OOM); os próximos pedidos usam um pool novo
+        if EXECUTOR is executor:
+            EXECUTOR = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+            executor.shutdown(wait=False)
+        raise
+
+class PDFChunks:
+    """Destino de escrita que guarda os blocos do PDF conforme o ReportLab os escreve"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+    
+    def getvalue(self):
+        # Com um único bloco, join devolve o próprio objeto, sem cópia
+        return b''.join(self.chunks)
+
+def format_columns(data, fields):
+    """Projeta as linhas em colunas e formata uma coluna por vez"""
+    get = dict.get
+    columns = [[get(row, field, "-") for row in data] for field in fields]
+    return [list(map(format_cell, column)) for column in columns]
+
+def column_widths(headers, columns, page_width):
+    """Calcula a largura das colunas pelo conteúdo, ocupando toda a página"""
+    padding = 16  # LEFTPADDING + RIGHTPADDING do TABLE_STYLE
+    max_width = page_width / 2
+    measure = stringWidth
+    widths = []
+    for header, column in zip(headers, columns):
+        width = measure(header, 'Helvetica-Bold', 10)
+        for value in column[:WIDTH_SAMPLE_ROWS]:
+            value_width = measure(value, 'Helvetica', 9)
+            if value_width > width:
+                width = value_width
+        widths.append(min(max(width + padding, MIN_COL_WIDTH), max_width))
+    scale = page_width / sum(widths)
+    return [width * scale for width in widths]
+
 def create_pdf(data, table_name, fields):
-    """Cria um PDF elegante com os dados"""
-    buffer = io.BytesIO()
+    """Cria um PDF elegante com os dados e retorna seus bytes"""
+    buffer = PDFChunks()
     
     pagesize = landscape(A4) if len(fields) > 5 else A4
     doc = SimpleDocTemplate(buffer, pagesize=pagesize, 
                            topMargin=1.5*cm, bottomMargin=1.5*cm,
-                           leftMargin=2*cm, rightMargin=2*cm)
+                           leftMargin=2*cm, rightMargin=2*cm,
+                           pageCompression=1)
     
     elements = []
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#666666'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
     
-    title = Paragraph(f"Relatório: {sanitize_text(table_name)}", title_style)
+    title = Paragraph(f"Relatório: {sanitize_text(table_name)}", TITLE_STYLE)
     elements.append(title)
     
     date_text = f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
-    subtitle = Paragraph(date_text, subtitle_style)
+    subtitle = Paragraph(date_text, SUBTITLE_STYLE)
     elements.append(subtitle)
     elements.append(Spacer(1, 0.5*cm))
     
     if not data:
-        no_data = Paragraph("Nenhum dado encontrado.", styles['Normal'])
+        no_data = Paragraph("Nenhum dado encontrado.", _STYLES['Normal'])
         elements.append(no_data)
     else:
         headers = [sanitize_text(field).upper() for field in fields]
-        table_data = [headers]
         
-        for row in data:
-            row_data = []
-            for field in fields:
-                value = row.get(field, "-")
-                formatted_value = format_value(value)
-                row_data.append(sanitize_text(formatted_value))
-            table_data.append(row_data)
+        formatted = format_columns(data, fields)
+        table_data = [headers] + list(map(list, zip(*formatted)))
         
         page_width = pagesize[0] - 4*cm
-        col_width = page_width / len(fields)
-        
-        table = Table(table_data, colWidths=[col_width] * len(fields))
-        
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ])
-        
-        table.setStyle(table_style)
+        col_widths = column_widths(headers, formatted, page_width)
+        
+        table_class = LongTable if len(data) > LONG_TABLE_ROWS else Table
+        table = table_class(table_data, colWidths=col_widths, repeatRows=1)
+        
+        table.setStyle(TABLE_STYLE)
         elements.append(table)
         
         elements.append(Spacer(1, 1*cm))
         footer_text = f"Total de registros: {len(data)}"
-        footer = Paragraph(footer_text, subtitle_style)
+        footer = Paragraph(footer_text, SUBTITLE_STYLE)
         elements.append(footer)
     
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
+
+def create_pdf_fpdf(data, table_name, fields):
+    """Cria o mesmo relatório com o fpdf2 e retorna seus bytes"""
+    is_landscape = len(fields) > 5
+    pagesize = landscape(A4) if is_landscape else A4
+    page_width = pagesize[0] - 4*cm
+    
+    pdf = FPDF(orientation='L' if is_landscape else 'P', unit='pt', format='A4')
+    pdf.set_margins(2*cm, 1.5*cm, 2*cm)
+    pdf.set_auto_page_break(True, margin=1.5*cm)
+    pdf.c_margin = 8
+    pdf.add_page()
+    
+    pdf.set_font('Helvetica', 'B', 24)
+    pdf.set_text_color(26, 26, 26)
+    pdf.cell(page_width, 30, f"Relatório: {sanitize_text(table_name)}", align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(30)
+    
+    date_text = f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
+    pdf.set_font('Helvetica', '', 10)
+    pdf.set_text_color(102, 102, 102)
+    pdf.cell(page_width, 12, date_text, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(20 + 0.5*cm)
+    
+    if not data:
+        pdf.set_text_color(0, 0, 0)
+        pdf.cell(page_width, 12, "Nenhum dado encontrado.", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    else:
+        headers = [sanitize_text(field).upper() for field in fields]
+        formatted = format_columns(data, fields)
+        col_widths = column_widths(headers, formatted, page_width)
+        
+        pdf.set_draw_color(222, 226, 230)
+        pdf.set_line_width(0.5)
+        
+        def draw_header():
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.set_fill_color(44, 62, 80)
+            pdf.set_text_color(245, 245, 245)
+            for width, header in zip(col_widths, headers):
+                pdf.cell(width, 34, header, border=1, fill=True)
+            pdf.ln()
+            pdf.set_font('Helvetica', '', 9)
+            pdf.set_fill_color(248, 249, 250)
+            pdf.set_text_color(0, 0, 0)
+        
+        draw_header()
+        cell = pdf.cell
+        for index, row in enumerate(zip(*formatted)):
+            if pdf.will_page_break(25):
+                pdf.add_page()
+                draw_header()
+            fill = index % 2 == 1
+            for width, value in zip(col_widths, row):
+                cell(width, 25, value, border=1, fill=fill)
+            pdf.ln()
+        
+        pdf.ln(1*cm)
+        pdf.set_font('Helvetica', '', 10)
+        pdf.set_text_color(102, 102, 102)
+        pdf.cell(page_width, 12, f"Total de registros: {len(data)}", align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    
+    return bytes(pdf.output())
 
-@app.route('/generate-pdf', methods=['POST'])
-def generate_pdf():
+@app.post('/generate-pdf')
+async def generate_pdf(request: Request):
     """Endpoint principal para gerar PDF e fazer upload"""
     try:
-        data = request.json
+        data = orjson.loads(await request.body())
         
         required_fields = ['table_name', 'fields', 'supabase_url', 'anon_key', 'bucket_name']
         for field in required_fields:
             if field not in data:
-                return jsonify({'error': f'Campo obrigatório ausente: {field}'}), 400
+                return ORJSONResponse({'error': f'Campo obrigatório ausente: {field}'}, status_code=400)
         
         table_name = data['table_name']
         fields = data['fields']
@@ -143,25 +412,51 @@ def generate_pdf():
         anon_key = data['anon_key']
         bucket_name = data['bucket_name']
         folder = data.get('folder', '')  # Pasta opcional
+        limit = data.get('limit', MAX_ROWS)  # Limite opcional de linhas
+        order_by = data.get('order_by')  # Coluna de ordenação opcional
+        postgres_dsn = data.get('postgres_dsn')  # Conexão direta opcional ao Postgres
         
         if not isinstance(fields, list) or len(fields) == 0:
-            return jsonify({'error': 'O campo "fields" deve ser uma lista não vazia'}), 400
+            return ORJSONResponse({'error': 'O campo "fields" deve ser uma lista não vazia'}, status_code=400)
+        
+        if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_ROWS:
+            return ORJSONResponse({'error': f'O campo "limit" deve ser um inteiro entre 1 e {MAX_ROWS}'}, status_code=400)
+        
+        if order_by is None:
+            order_by = fields[0]
+        elif not isinstance(order_by, str) or not order_by:
+            return ORJSONResponse({'error': 'O campo "order_by" deve ser o nome de uma coluna'}, status_code=400)
+        
+        if postgres_dsn is not None and not isinstance(postgres_dsn, str):
+            return ORJSONResponse({'error': 'O campo "postgres_dsn" deve ser uma string de conexão'}, status_code=400)
+        
+        # Reaproveitar um relatório idêntico gerado há pouco
+        cache_key = report_cache_key(supabase_url, anon_key, table_name, tuple(fields), order_by, limit, postgres_dsn, bucket_name, folder)
+        cached = PDF_CACHE.get(cache_key)
+        if cached is not None:
+            return ORJSONResponse(cached, status_code=200)
         
         # Conectar ao Supabase
         try:
-            supabase = create_client(supabase_url, anon_key)
+            supabase = await get_client(supabase_url, anon_key)
         except Exception as e:
-            return jsonify({'error': f'Erro ao conectar com Supabase: {str(e)}'}), 400
+            return ORJSONResponse({'error': f'Erro ao conectar com Supabase: {str(e)}'}, status_code=400)
         
         # Buscar dados da tabela
         try:
-            response = supabase.table(table_name).select(','.join(fields)).execute()
-            table_data = response.data
+            async with asyncio.timeout(FETCH_TIMEOUT):
+                if postgres_dsn:
+                    table_data = [row async for row in copy_rows(postgres_dsn, table_name, fields, order_by, limit)]
+                else:
+                    table_data = [row async for page in fetch_pages(supabase, table_name, fields, order_by, limit) for row in page]
+        except TimeoutError:
+            return ORJSONResponse({'error': f'Tempo esgotado ao buscar dados ({FETCH_TIMEOUT}s)'}, status_code=504)
         except Exception as e:
-            return jsonify({'error': f'Erro ao buscar dados: {str(e)}'}), 400
+            return ORJSONResponse({'error': f'Erro ao buscar dados: {str(e)}'}, status_code=400)
         
-        # Gerar PDF
-        pdf_buffer = create_pdf(table_data, table_name, fields)
+        # Gerar PDF no pool de processos, fora do event loop
+        build_pdf = create_pdf_fpdf if PDF_BACKEND == 'fpdf2' else create_pdf
+        pdf_bytes = await run_in_pool(build_pdf, table_data, table_name, fields)
         
         # Nome do arquivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -176,36 +471,35 @@ def generate_pdf():
         
         # Upload para o Supabase Storage
         try:
-            pdf_bytes = pdf_buffer.getvalue()
-            
-            upload_response = supabase.storage.from_(bucket_name).upload(
+            bucket = supabase.storage.from_(bucket_name)
+            upload_response = await bucket.upload(
                 path=file_path,
                 file=pdf_bytes,
                 file_options={"content-type": "application/pdf"}
             )
             
             # Gerar URL pública
-            public_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
+            public_url = await bucket.get_public_url(file_path)
             
-            return jsonify({
+            result = {
                 'success': True,
                 'pdf_link': public_url,
                 'filename': filename,
                 'path': file_path,
                 'records_count': len(table_data),
                 'generated_at': datetime.now().isoformat()
-            }), 200
+            }
+            PDF_CACHE[cache_key] = result
+            
+            return ORJSONResponse(result, status_code=200)
             
         except Exception as e:
-            return jsonify({'error': f'Erro ao fazer upload do PDF: {str(e)}'}), 500
+            return ORJSONResponse({'error': f'Erro ao fazer upload do PDF: {str(e)}'}, status_code=500)
         
     except Exception as e:
-        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+        return ORJSONResponse({'error': f'Erro interno: {str(e)}'}, status_code=500)
 
-@app.route('/health', methods=['GET'])
-def health():
+@app.get('/health')
+async def health():
     """Endpoint de verificação de saúde"""
-    return jsonify({'status': 'ok', 'message': 'API funcionando corretamente'}), 200
-
-if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    return ORJSONResponse({'status': 'ok', 'message': 'API funcionando corretamente'}, status_code=200)